@@ -7,38 +7,263 @@ Includes Phase 2: WAL, SESSION-STATE, working buffer, self-healing.
 
 import json
 import argparse
+import atexit
+import contextlib
+import heapq
+import os
 import sys
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Optional, Dict, List, Any
+from typing import Optional, BinaryIO, Dict, Iterable, List, Any, TextIO, Tuple
 import uuid
 
+# orjson is a CPython extension; PyPy's JIT-backed stdlib json is the faster choice there
+orjson = None
+if sys.implementation.name != "pypy":
+    try:
+        import orjson
+    except ImportError:
+        pass
+
 # Data file location
 SCRIPT_DIR = Path(__file__).parent
 DATA_DIR = SCRIPT_DIR.parent / "data"
 DATA_FILE = DATA_DIR / "tasks.json"
+LOG_FILE = DATA_DIR / "tasks.log"
 PROJECT_ROOT = SCRIPT_DIR.parent
 WORKSPACE_ROOT = PROJECT_ROOT.parent.parent
 MEMORY_DIR = WORKSPACE_ROOT / "memory"
 SESSION_STATE_FILE = WORKSPACE_ROOT / "SESSION-STATE.md"
 WORKING_BUFFER_FILE = MEMORY_DIR / "working-buffer.md"
 
+# Lazily opened handles, reused for the whole process
+_session_state_fd: Optional[int] = None
+_wal_file: Optional[BinaryIO] = None
+_wal_date: Optional[str] = None
+_buffer_file: Optional[BinaryIO] = None
+
+# Compact the data log into a fresh snapshot once it grows past this size
+COMPACT_THRESHOLD_BYTES = 1024 * 1024
+
+# Record fields with a handful of repeated values, interned on load
+INTERNED_FIELDS = ("status", "priority", "recurring")
+
+# Snapshot after this many daemon commands (tasks.log is also compacted by size)
+DAEMON_SNAPSHOT_EVERY = 1000
+
+class TaskManagerError(Exception):
+    """A command failed; reported as {"success": false, "error": ...}."""
+
 # Ensure directories exist
 DATA_DIR.mkdir(exist_ok=True)
 MEMORY_DIR.mkdir(exist_ok=True)
 
+def encode_json(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def decode_json(raw: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def emit(result: Dict[str, Any], indent: bool = True, stream: Optional[TextIO] = None) -> None:
+    """Write a command result as JSON bytes straight to stdout (or stream)."""
+    out = (stream or sys.stdout).buffer
+    out.write(encode_json(result, indent=indent) + b"\n")
+
 def load_data() -> Dict[str, Any]:
-    """Load tasks data from JSON file."""
-    if not DATA_FILE.exists():
-        return {"goals": [], "tasks": []}
+    """Load tasks data: read the tasks.json snapshot, then replay tasks.log on top."""
+    # Open the log before reading the snapshot. compact() swaps in a new log file
+    # rather than truncating, so if it runs in between, this handle still holds
+    # every change that went into the newer snapshot and replay stays consistent.
+    try:
+        log_file = open(LOG_FILE, 'rb')
+    except FileNotFoundError:
+        log_file = None
+    
+    if DATA_FILE.exists():
+        with open(DATA_FILE, 'rb') as f:
+            data = decode_json(f.read())
+    else:
+        data = {}
+    data.setdefault("goals", [])
+    data.setdefault("tasks", [])
+    
+    # id -> record lookups for this invocation; stripped again before snapshots.
+    # The same pass interns enum-like fields so comparisons hit the identity fast path.
+    for kind in ("goal", "task"):
+        index = data[f"_{kind}_index"] = {}
+        for record in data[f"{kind}s"]:
+            intern_fields(record)
+            # Records without an id stay in the list for health-check to see
+            if "id" in record:
+                index[record["id"]] = record
+    
+    # Which tasks.log (inode) this data reflects and how far into it, so
+    # catch_up_log can later pick up lines other processes appended
+    data["_log_inode"] = None
+    data["_log_offset"] = 0
+    data["_pending_writes"] = 0
+    if log_file is not None:
+        with log_file:
+            data["_log_inode"] = os.fstat(log_file.fileno()).st_ino
+            replay_log(data, log_file)
+    
+    return data
+
+def replay_log(data: Dict[str, Any], log_file: BinaryIO) -> None:
+    """Apply logged goal/task upserts from data["_log_offset"] onward, in log order.
+    
+    The offset only advances past newline-terminated lines, so an unterminated
+    tail is read again once it is complete or repaired.
+    """
+    log_file.seek(data["_log_offset"])
+    for line in log_file:
+        terminated = line.endswith(b"\n")
+        try:
+            entry = decode_json(line)
+        except ValueError:
+            if not terminated:
+                # Torn trailing write from an interrupted command
+                continue
+            raise TaskManagerError(f"Corrupt entry in {LOG_FILE} at byte {data['_log_offset']}")
+        if terminated:
+            data["_log_offset"] += len(line)
+        
+        record = entry[entry["op"]]
+        intern_fields(record)
+        existing = data[f"_{entry['op']}_index"].get(record.get("id"))
+        if existing is not None:
+            existing.clear()
+            existing.update(record)
+        else:
+            add_record(data, entry["op"], record)
+
+def intern_fields(record: Dict) -> None:
+    """Intern the small set of repeated string values (status, priority, recurring)."""
+    for field in INTERNED_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            record[field] = sys.intern(value)
+
+def add_record(data: Dict[str, Any], kind: str, record: Dict) -> None:
+    """Add a new goal or task (kind "goal"/"task") to data and its id index."""
+    data[f"{kind}s"].append(record)
+    if "id" in record:
+        data[f"_{kind}_index"][record["id"]] = record
+
+def save_data(data: Dict[str, Any], goals: Iterable[Dict] = (), tasks: Iterable[Dict] = ()) -> None:
+    """Persist changed goals/tasks by appending one line per record to tasks.log."""
+    lines = [encode_json({"op": "goal", "goal": goal}) + b"\n" for goal in goals]
+    lines += [encode_json({"op": "task", "task": task}) + b"\n" for task in tasks]
+    if not lines:
+        return
+    
+    payload = b"".join(lines)
+    with open(LOG_FILE, 'a+b', buffering=0) as f:
+        if not ends_with_newline(f):
+            repair_log_tail(f)
+        f.write(payload)
+        end = f.tell()
+        same_log = os.fstat(f.fileno()).st_ino == data["_log_inode"]
+    
+    # If nothing foreign landed between what we last read and our own lines,
+    # those lines are already applied in memory; otherwise leave the offset so
+    # catch_up_log replays the gap and our lines after it, in log order.
+    if same_log and end - len(payload) == data["_log_offset"]:
+        data["_log_offset"] = end
+    data["_pending_writes"] += len(lines)
+    
+    if end > COMPACT_THRESHOLD_BYTES:
+        compact(data)
+
+def ends_with_newline(log_file: BinaryIO) -> bool:
+    """True if the log is empty or its last byte is a newline."""
+    end = log_file.seek(0, os.SEEK_END)
+    if end == 0:
+        return True
+    log_file.seek(end - 1)
+    return log_file.read(1) == b"\n"
+
+def repair_log_tail(log_file: BinaryIO) -> None:
+    """Terminate or cut an unterminated last line so the next append starts on its own line.
+    
+    A tail that still parses only lost its newline and is kept; anything else is
+    a torn write (replay already skips it) and is truncated away.
+    """
+    end = log_file.seek(0, os.SEEK_END)
+    start = end
+    while start > 0:
+        chunk_start = max(0, start - 4096)
+        log_file.seek(chunk_start)
+        newline = log_file.read(start - chunk_start).rfind(b"\n")
+        if newline != -1:
+            start = chunk_start + newline + 1
+            break
+        start = chunk_start
+    
+    log_file.seek(start)
+    try:
+        decode_json(log_file.read(end - start))
+    except ValueError:
+        log_file.truncate(start)
+    else:
+        log_file.write(b"\n")
+
+def catch_up_log(data: Dict[str, Any]) -> None:
+    """Bring data up to date with tasks.log lines other processes appended since it was read."""
+    try:
+        log_file = open(LOG_FILE, 'rb')
+    except FileNotFoundError:
+        return
     
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
+    with log_file:
+        if os.fstat(log_file.fileno()).st_ino == data["_log_inode"]:
+            replay_log(data, log_file)
+            return
+    
+    # The log was created or swapped out by another process's compaction since
+    # we read it; everything this process wrote is on disk, so reload from there
+    fresh = load_data()
+    data.clear()
+    data.update(fresh)
+
+def compact(data: Dict[str, Any]) -> None:
+    """Atomically replace tasks.json with a full snapshot, then swap in an empty tasks.log.
+    
+    Unseen log lines are replayed first so other processes' appends are kept. Without
+    locks, only appends landing between that catch-up and the log swap can be lost.
+    """
+    catch_up_log(data)
+    snapshot = {k: v for k, v in data.items() if not k.startswith("_")}
+    # Compact on disk; indented output is only for results a human reads
+    replace_file(DATA_FILE, encode_json(snapshot))
+    replace_file(LOG_FILE, b"")
+    data["_log_inode"] = os.stat(LOG_FILE).st_ino
+    data["_log_offset"] = 0
+    data["_pending_writes"] = 0
+
+def replace_file(path: Path, content: bytes) -> None:
+    """Write content to a sibling temp file, fsync it, then os.replace it over path."""
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    # Default buffering, one write() of the whole blob: BufferedWriter passes
+    # writes larger than its buffer straight to the OS without copying
+    with open(tmp_file, 'wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
 
-def save_data(data: Dict[str, Any]) -> None:
-    """Save tasks data to JSON file."""
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+def utc_now() -> Tuple[str, str]:
+    """Current UTC time as (isoformat, isoformat + "Z"); call once per command and reuse."""
+    now = datetime.now(timezone.utc).isoformat()
+    return now, now + "Z"
 
 def generate_id(prefix: str) -> str:
     """Generate a unique ID."""
@@ -52,12 +277,13 @@ def find_goal_by_title(data: Dict[str, Any], title: str) -> Optional[Dict]:
             return goal
     return None
 
+def find_goal_by_id(data: Dict[str, Any], goal_id: str) -> Optional[Dict]:
+    """Find a goal by ID."""
+    return data["_goal_index"].get(goal_id)
+
 def find_task_by_id(data: Dict[str, Any], task_id: str) -> Optional[Dict]:
     """Find a task by ID."""
-    for task in data["tasks"]:
-        if task["id"] == task_id:
-            return task
-    return None
+    return data["_task_index"].get(task_id)
 
 def get_task_dependencies_met(data: Dict[str, Any], task: Dict) -> bool:
     """Check if all task dependencies are completed."""
@@ -71,33 +297,28 @@ def get_task_dependencies_met(data: Dict[str, Any], task: Dict) -> bool:
     
     return True
 
-def add_goal(args) -> None:
+def add_goal(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Add a new goal."""
-    data = load_data()
-    
     goal = {
         "id": generate_id("goal"),
         "title": args.title,
         "priority": args.priority,
         "context": args.context or "",
-        "created_at": datetime.now(timezone.utc).isoformat() + "Z",
+        "created_at": utc_now()[1],
         "status": args.status
     }
     
-    data["goals"].append(goal)
-    save_data(data)
+    add_record(data, "goal", goal)
+    save_data(data, goals=[goal])
     
-    print(json.dumps({"success": True, "goal": goal}, indent=2))
+    return {"success": True, "goal": goal}
 
-def add_task(args) -> None:
+def add_task(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Add a task to a goal."""
-    data = load_data()
-    
     # Find the goal
     goal = find_goal_by_title(data, args.goal_title)
     if not goal:
-        print(json.dumps({"success": False, "error": f"Goal not found: {args.goal_title}"}), file=sys.stderr)
-        sys.exit(1)
+        raise TaskManagerError(f"Goal not found: {args.goal_title}")
     
     task = {
         "id": generate_id("task"),
@@ -105,7 +326,7 @@ def add_task(args) -> None:
         "title": args.task_title,
         "priority": args.priority or goal["priority"],
         "status": "pending",
-        "created_at": datetime.now(timezone.utc).isoformat() + "Z",
+        "created_at": utc_now()[1],
         "notes": ""
     }
     
@@ -115,15 +336,13 @@ def add_task(args) -> None:
     if args.estimate:
         task["estimate_minutes"] = args.estimate
     
-    data["tasks"].append(task)
-    save_data(data)
+    add_record(data, "task", task)
+    save_data(data, tasks=[task])
     
-    print(json.dumps({"success": True, "task": task}, indent=2))
+    return {"success": True, "task": task}
 
-def next_task(args) -> None:
+def next_task(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Get the next task to work on."""
-    data = load_data()
-    
     # Filter pending tasks
     candidates = [
         task for task in data["tasks"]
@@ -142,8 +361,7 @@ def next_task(args) -> None:
         ]
     
     if not candidates:
-        print(json.dumps({"success": True, "task": None, "message": "No tasks available"}))
-        return
+        return {"success": True, "task": None, "message": "No tasks available"}
     
     # Sort by priority (high > medium > low)
     priority_order = {"high": 3, "medium": 2, "low": 1}
@@ -152,7 +370,7 @@ def next_task(args) -> None:
     next_task = candidates[0]
     
     # Get goal info
-    goal = next((g for g in data["goals"] if g["id"] == next_task["goal_id"]), None)
+    goal = find_goal_by_id(data, next_task["goal_id"])
     
     result = {
         "success": True,
@@ -160,35 +378,29 @@ def next_task(args) -> None:
         "goal": goal
     }
     
-    print(json.dumps(result, indent=2))
+    return result
 
-def complete_task(args) -> None:
+def complete_task(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Mark a task as completed."""
-    data = load_data()
-    
     task = find_task_by_id(data, args.task_id)
     if not task:
-        print(json.dumps({"success": False, "error": f"Task not found: {args.task_id}"}), file=sys.stderr)
-        sys.exit(1)
+        raise TaskManagerError(f"Task not found: {args.task_id}")
     
     task["status"] = "completed"
-    task["completed_at"] = datetime.now(timezone.utc).isoformat() + "Z"
+    task["completed_at"] = utc_now()[1]
     
     if args.notes:
         task["notes"] = args.notes
     
-    save_data(data)
+    save_data(data, tasks=[task])
     
-    print(json.dumps({"success": True, "task": task}, indent=2))
+    return {"success": True, "task": task}
 
-def update_task(args) -> None:
+def update_task(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Update a task."""
-    data = load_data()
-    
     task = find_task_by_id(data, args.task_id)
     if not task:
-        print(json.dumps({"success": False, "error": f"Task not found: {args.task_id}"}), file=sys.stderr)
-        sys.exit(1)
+        raise TaskManagerError(f"Task not found: {args.task_id}")
     
     if args.status:
         task["status"] = args.status
@@ -202,16 +414,14 @@ def update_task(args) -> None:
         else:
             task["notes"] = args.notes
     
-    task["updated_at"] = datetime.now(timezone.utc).isoformat() + "Z"
+    task["updated_at"] = utc_now()[1]
     
-    save_data(data)
+    save_data(data, tasks=[task])
     
-    print(json.dumps({"success": True, "task": task}, indent=2))
+    return {"success": True, "task": task}
 
-def list_goals(args) -> None:
+def list_goals(data: Dict[str, Any], args) -> Dict[str, Any]:
     """List all goals."""
-    data = load_data()
-    
     goals = data["goals"]
     
     if args.status:
@@ -220,16 +430,13 @@ def list_goals(args) -> None:
     if args.priority:
         goals = [g for g in goals if g["priority"] == args.priority]
     
-    print(json.dumps({"success": True, "goals": goals}, indent=2))
+    return {"success": True, "goals": goals}
 
-def list_tasks(args) -> None:
+def list_tasks(data: Dict[str, Any], args) -> Dict[str, Any]:
     """List tasks for a goal."""
-    data = load_data()
-    
     goal = find_goal_by_title(data, args.goal_title)
     if not goal:
-        print(json.dumps({"success": False, "error": f"Goal not found: {args.goal_title}"}), file=sys.stderr)
-        sys.exit(1)
+        raise TaskManagerError(f"Goal not found: {args.goal_title}")
     
     tasks = [t for t in data["tasks"] if t["goal_id"] == goal["id"]]
     
@@ -239,39 +446,67 @@ def list_tasks(args) -> None:
     if args.priority:
         tasks = [t for t in tasks if t["priority"] == args.priority]
     
-    print(json.dumps({"success": True, "goal": goal, "tasks": tasks}, indent=2))
+    return {"success": True, "goal": goal, "tasks": tasks}
 
-def status(args) -> None:
+def status(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Show overall status."""
-    data = load_data()
-    
-    active_goals = [g for g in data["goals"] if g["status"] == "active"]
+    active_goals_count = sum(1 for g in data["goals"] if g["status"] == "active")
     
-    tasks_by_status = {}
-    for status_name in ["pending", "in_progress", "blocked", "needs_input", "completed"]:
-        tasks_by_status[status_name] = len([t for t in data["tasks"] if t["status"] == status_name])
+    # Single pass: count by status and collect completions together
+    tasks_by_status = dict.fromkeys(["pending", "in_progress", "blocked", "needs_input", "completed"], 0)
+    completed_tasks = []
+    for task in data["tasks"]:
+        task_status = task["status"]
+        if task_status in tasks_by_status:
+            tasks_by_status[task_status] += 1
+        if task_status == "completed":
+            completed_tasks.append(task)
     
     # Recent completions (last 5)
-    completed_tasks = [t for t in data["tasks"] if t["status"] == "completed"]
-    completed_tasks.sort(key=lambda t: t.get("completed_at", ""), reverse=True)
-    recent_completions = completed_tasks[:5]
+    recent_completions = heapq.nlargest(5, completed_tasks, key=lambda t: t.get("completed_at", ""))
     
     result = {
         "success": True,
-        "active_goals_count": len(active_goals),
+        "active_goals_count": active_goals_count,
         "tasks_by_status": tasks_by_status,
         "recent_completions": recent_completions
     }
     
-    print(json.dumps(result, indent=2))
+    return result
 
 # ==================== PHASE 2: WAL, SESSION-STATE, HEALTH-CHECK ====================
 
-def log_to_wal(event_type: str, content: Dict[str, Any]) -> None:
+def get_wal(today: str) -> BinaryIO:
+    """Return the append handle for today's WAL file, rotating when the date changes."""
+    global _wal_file, _wal_date
+    if _wal_file is None or _wal_date != today:
+        if _wal_file is not None:
+            _wal_file.close()
+        _wal_file = open(MEMORY_DIR / f"WAL-{today}.log", 'ab', buffering=0)
+        _wal_date = today
+    return _wal_file
+
+
+def get_buffer() -> BinaryIO:
+    """Return the append handle for the working buffer."""
+    global _buffer_file
+    if _buffer_file is None:
+        _buffer_file = open(WORKING_BUFFER_FILE, 'ab', buffering=0)
+    return _buffer_file
+
+
+@atexit.register
+def close_append_handles() -> None:
+    """Close the WAL and working-buffer handles at exit."""
+    for handle in (_wal_file, _buffer_file):
+        if handle is not None:
+            handle.close()
+
+
+def log_to_wal(event_type: str, content: Dict[str, Any], timestamp: Optional[str] = None) -> None:
     """Write-Ahead Logging: Log critical changes BEFORE persisting data."""
-    timestamp = datetime.now(timezone.utc).isoformat()
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    wal_file = MEMORY_DIR / f"WAL-{today}.log"
+    timestamp = timestamp or utc_now()[0]
+    today = timestamp[:10]
     
     wal_entry = {
         "timestamp": timestamp,
@@ -279,21 +514,59 @@ def log_to_wal(event_type: str, content: Dict[str, Any]) -> None:
         "content": content
     }
     
-    with open(wal_file, 'a') as f:
-        f.write(json.dumps(wal_entry) + "\n")
+    # Unbuffered O_APPEND: one write() per entry
+    get_wal(today).write(encode_json(wal_entry) + b"\n")
 
 
-def append_to_buffer(event_type: str, details: str) -> None:
+def append_to_buffer(event_type: str, details: str, timestamp: Optional[str] = None) -> None:
     """Append to working buffer - captures all changes during danger zone."""
-    timestamp = datetime.now(timezone.utc).isoformat()
+    timestamp = timestamp or utc_now()[0]
     entry = f"- {event_type} ({timestamp}): {details}\n"
     
-    with open(WORKING_BUFFER_FILE, 'a') as f:
-        f.write(entry)
+    get_buffer().write(entry.encode())
+
 
+SESSION_STATE_TEMPLATE = """# SESSION-STATE.md - Active Working Memory
+Last updated: %(timestamp)s
 
-def update_session_state(task: Dict, goal: Dict, action: str = "") -> None:
+## Current Task
+- ID: %(task_id)s
+- Title: %(task_title)s
+- Status: %(status)s
+- Progress: %(progress)s%%
+- Estimated: %(estimate)s min
+- Actual logged: %(actual)s min %(velocity)s
+
+## Goal Context
+- ID: %(goal_id)s
+- Title: %(goal_title)s
+- Priority: %(goal_priority)s
+
+## Task Details
+- Created: %(created_at)s
+- Updated: %(updated_at)s
+- Notes: %(notes)s
+
+## Blockers
+- %(blocked_reason)s
+
+## Next Action
+%(action)s
+"""
+
+
+def get_session_state_fd() -> int:
+    """Open SESSION-STATE.md once per process; closed at exit."""
+    global _session_state_fd
+    if _session_state_fd is None:
+        _session_state_fd = os.open(SESSION_STATE_FILE, os.O_WRONLY | os.O_CREAT, 0o644)
+        atexit.register(os.close, _session_state_fd)
+    return _session_state_fd
+
+
+def update_session_state(task: Dict, goal: Dict, action: str = "", timestamp: Optional[str] = None) -> None:
     """Update SESSION-STATE.md with current task context."""
+    timestamp = timestamp or utc_now()[0]
     progress = task.get("progress", 0)
     estimate = task.get("estimate_minutes", 0)
     actual = task.get("actual_minutes", 0)
@@ -303,65 +576,57 @@ def update_session_state(task: Dict, goal: Dict, action: str = "") -> None:
     if estimate > 0:
         ratio = actual / estimate
         if ratio < 1:
-            velocity = f"{int((1 - ratio) * 100)}% faster than estimate"
+            velocity = f"({int((1 - ratio) * 100)}% faster than estimate)"
         elif ratio > 1:
-            velocity = f"{int((ratio - 1) * 100)}% slower than estimate"
+            velocity = f"({int((ratio - 1) * 100)}% slower than estimate)"
         else:
-            velocity = "on pace with estimate"
+            velocity = "(on pace with estimate)"
     
-    content = f"""# SESSION-STATE.md - Active Working Memory
-Last updated: {datetime.now(timezone.utc).isoformat()}
-
-## Current Task
-- ID: {task.get("id", "unknown")}
-- Title: {task.get("title", "N/A")}
-- Status: {status}
-- Progress: {progress}%
-- Estimated: {estimate} min
-- Actual logged: {actual} min {f"({velocity})" if velocity else ""}
-
-## Goal Context
-- ID: {goal.get("id", "unknown")}
-- Title: {goal.get("title", "N/A")}
-- Priority: {goal.get("priority", "medium")}
-
-## Task Details
-- Created: {task.get("created_at", "N/A")}
-- Updated: {task.get("updated_at", "N/A")}
-- Notes: {task.get("notes", "None")}
-
-## Blockers
-- {task.get("blocked_reason", "None")}
-
-## Next Action
-{action or "Continue with current task or mark as complete"}
-"""
+    content = SESSION_STATE_TEMPLATE % {
+        "timestamp": timestamp,
+        "task_id": task.get("id", "unknown"),
+        "task_title": task.get("title", "N/A"),
+        "status": status,
+        "progress": progress,
+        "estimate": estimate,
+        "actual": actual,
+        "velocity": velocity,
+        "goal_id": goal.get("id", "unknown"),
+        "goal_title": goal.get("title", "N/A"),
+        "goal_priority": goal.get("priority", "medium"),
+        "created_at": task.get("created_at", "N/A"),
+        "updated_at": task.get("updated_at", "N/A"),
+        "notes": task.get("notes", "None"),
+        "blocked_reason": task.get("blocked_reason", "None"),
+        "action": action or "Continue with current task or mark as complete"
+    }
     
-    with open(SESSION_STATE_FILE, 'w') as f:
-        f.write(content)
+    fd = get_session_state_fd()
+    os.ftruncate(fd, 0)
+    os.pwrite(fd, content.encode(), 0)
 
 
-def mark_progress(args) -> None:
+def mark_progress(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Mark task progress (0-100%) - Phase 2 enhanced."""
-    data = load_data()
     task = find_task_by_id(data, args.task_id)
     
     if not task:
-        print(json.dumps({"success": False, "error": f"Task not found: {args.task_id}"}), file=sys.stderr)
-        sys.exit(1)
+        raise TaskManagerError(f"Task not found: {args.task_id}")
     
     old_progress = task.get("progress", 0)
     
+    now, now_z = utc_now()
+    
     # WAL FIRST
     log_to_wal("PROGRESS_CHANGE", {
         "task_id": args.task_id,
         "old_progress": old_progress,
         "new_progress": args.progress,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
+        "timestamp": now
+    }, now)
     
     task["progress"] = args.progress
-    task["updated_at"] = datetime.now(timezone.utc).isoformat() + "Z"
+    task["updated_at"] = now_z
     
     if args.notes:
         if task.get("notes"):
@@ -374,45 +639,45 @@ def mark_progress(args) -> None:
     elif args.progress > 0 and task.get("status") == "pending":
         task["status"] = "in_progress"
     
-    save_data(data)
+    save_data(data, tasks=[task])
     
-    goal = next((g for g in data["goals"] if g["id"] == task.get("goal_id")), None)
+    goal = find_goal_by_id(data, task.get("goal_id"))
     if goal:
-        update_session_state(task, goal, f"Progress marked: {old_progress}% → {args.progress}%")
+        update_session_state(task, goal, f"Progress marked: {old_progress}% → {args.progress}%", now)
     
-    append_to_buffer("PROGRESS", f"{args.task_id}: {old_progress}% → {args.progress}%")
+    append_to_buffer("PROGRESS", f"{args.task_id}: {old_progress}% → {args.progress}%", now)
     
     result = {
         "success": True,
         "task": task,
         "progress_change": f"{old_progress}% → {args.progress}%"
     }
-    print(json.dumps(result, indent=2))
+    return result
 
 
-def log_time(args) -> None:
+def log_time(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Log time spent on a task - Phase 2 enhanced."""
-    data = load_data()
     task = find_task_by_id(data, args.task_id)
     
     if not task:
-        print(json.dumps({"success": False, "error": f"Task not found: {args.task_id}"}), file=sys.stderr)
-        sys.exit(1)
+        raise TaskManagerError(f"Task not found: {args.task_id}")
     
     old_actual = task.get("actual_minutes", 0)
     new_actual = old_actual + args.minutes
     
+    now, now_z = utc_now()
+    
     # WAL FIRST
     log_to_wal("TIME_LOG", {
         "task_id": args.task_id,
         "minutes_logged": args.minutes,
         "old_total": old_actual,
         "new_total": new_actual,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
+        "timestamp": now
+    }, now)
     
     task["actual_minutes"] = new_actual
-    task["updated_at"] = datetime.now(timezone.utc).isoformat() + "Z"
+    task["updated_at"] = now_z
     
     if args.notes:
         if task.get("notes"):
@@ -423,13 +688,13 @@ def log_time(args) -> None:
     if task.get("status") == "pending" and new_actual > 0:
         task["status"] = "in_progress"
     
-    save_data(data)
+    save_data(data, tasks=[task])
     
-    goal = next((g for g in data["goals"] if g["id"] == task.get("goal_id")), None)
+    goal = find_goal_by_id(data, task.get("goal_id"))
     if goal:
-        update_session_state(task, goal, f"Logged {args.minutes} min (total: {new_actual} min)")
+        update_session_state(task, goal, f"Logged {args.minutes} min (total: {new_actual} min)", now)
     
-    append_to_buffer("TIME_LOG", f"{args.task_id}: +{args.minutes} min (total: {new_actual} min)")
+    append_to_buffer("TIME_LOG", f"{args.task_id}: +{args.minutes} min (total: {new_actual} min)", now)
     
     estimate = task.get("estimate_minutes", 0)
     velocity = ""
@@ -448,40 +713,40 @@ def log_time(args) -> None:
         "estimate": estimate,
         "velocity": velocity
     }
-    print(json.dumps(result, indent=2))
+    return result
 
 
-def mark_blocked(args) -> None:
+def mark_blocked(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Mark task as blocked - Phase 2 enhanced."""
-    data = load_data()
     task = find_task_by_id(data, args.task_id)
     
     if not task:
-        print(json.dumps({"success": False, "error": f"Task not found: {args.task_id}"}), file=sys.stderr)
-        sys.exit(1)
+        raise TaskManagerError(f"Task not found: {args.task_id}")
     
     old_status = task.get("status", "pending")
     
+    now, now_z = utc_now()
+    
     # WAL FIRST
     log_to_wal("STATUS_CHANGE", {
         "task_id": args.task_id,
         "old_status": old_status,
         "new_status": "blocked",
         "reason": args.reason,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
+        "timestamp": now
+    }, now)
     
     task["status"] = "blocked"
     task["blocked_reason"] = args.reason
-    task["updated_at"] = datetime.now(timezone.utc).isoformat() + "Z"
+    task["updated_at"] = now_z
     
-    save_data(data)
+    save_data(data, tasks=[task])
     
-    goal = next((g for g in data["goals"] if g["id"] == task.get("goal_id")), None)
+    goal = find_goal_by_id(data, task.get("goal_id"))
     if goal:
-        update_session_state(task, goal, f"BLOCKED: {args.reason}")
+        update_session_state(task, goal, f"BLOCKED: {args.reason}", now)
     
-    append_to_buffer("BLOCKED", f"{args.task_id}: {args.reason}")
+    append_to_buffer("BLOCKED", f"{args.task_id}: {args.reason}", now)
     
     result = {
         "success": True,
@@ -489,52 +754,65 @@ def mark_blocked(args) -> None:
         "status_change": f"{old_status} → blocked",
         "reason": args.reason
     }
-    print(json.dumps(result, indent=2))
+    return result
 
 
-def health_check(args) -> None:
+def health_check(data: Dict[str, Any], args) -> Dict[str, Any]:
     """Health check: detect and report broken task states."""
-    data = load_data()
+    now, now_z = utc_now()
     issues = []
     fixes = []
+    fixed_tasks = []
     
     for task in data["tasks"]:
         task_id = task.get("id", "unknown")
+        fixes_before = len(fixes)
+        task_status = task.get("status")
+        completed_at = task.get("completed_at")
+        actual_minutes = task.get("actual_minutes", 0)
+        estimate_minutes = task.get("estimate_minutes") or 0
         
         if task.get("recurring") and not task.get("goal_id"):
             issues.append(f"Orphaned recurring task: {task_id}")
             task["recurring"] = None
             fixes.append(f"Removed recurring flag from {task_id}")
         
-        if task.get("status") == "completed" and task.get("progress", 100) < 100:
-            issues.append(f"Impossible state: {task_id} completed but progress={task.get('progress')}%")
-            task["progress"] = 100
-            fixes.append(f"Set progress=100% for completed task {task_id}")
+        if task_status == "completed":
+            progress = task.get("progress", 100)
+            if progress < 100:
+                issues.append(f"Impossible state: {task_id} completed but progress={progress}%")
+                task["progress"] = 100
+                fixes.append(f"Set progress=100% for completed task {task_id}")
+            
+            if not completed_at:
+                issues.append(f"Inconsistent completion: {task_id} status=completed but no completed_at")
+                task["completed_at"] = completed_at = now_z
+                fixes.append(f"Added completed_at timestamp to {task_id}")
         
-        if task.get("status") == "completed" and not task.get("completed_at"):
-            issues.append(f"Inconsistent completion: {task_id} status=completed but no completed_at")
-            task["completed_at"] = datetime.now(timezone.utc).isoformat() + "Z"
-            fixes.append(f"Added completed_at timestamp to {task_id}")
+        # Only tasks with an estimate can be anomalous; divide only when flagged
+        if estimate_minutes and actual_minutes > estimate_minutes * 10:
+            ratio = actual_minutes / estimate_minutes
+            issues.append(f"Time anomaly: {task_id} actual={actual_minutes}m vs estimate={estimate_minutes}m ({ratio:.1f}x)")
         
-        if task.get("actual_minutes", 0) > task.get("estimate_minutes", 1) * 10:
-            ratio = task.get("actual_minutes", 0) / task.get("estimate_minutes", 1)
-            issues.append(f"Time anomaly: {task_id} actual={task.get('actual_minutes')}m vs estimate={task.get('estimate_minutes')}m ({ratio:.1f}x)")
+        if task_status == "completed" and completed_at > now_z:
+            issues.append(f"Bad date: {task_id} completed_at={completed_at} is in future")
+            task["completed_at"] = now_z
+            fixes.append(f"Reset completed_at for {task_id}")
         
-        if task.get("status") == "completed":
-            completed_at = task.get("completed_at", "")
-            if completed_at > datetime.now(timezone.utc).isoformat():
-                issues.append(f"Bad date: {task_id} completed_at={completed_at} is in future")
-                task["completed_at"] = datetime.now(timezone.utc).isoformat() + "Z"
-                fixes.append(f"Reset completed_at for {task_id}")
+        if len(fixes) > fixes_before:
+            fixed_tasks.append(task)
     
-    if fixes:
-        save_data(data)
+    if any("id" not in task for task in fixed_tasks):
+        # Log replay upserts by id, so only a full snapshot can persist these fixes
+        compact(data)
+    elif fixed_tasks:
+        save_data(data, tasks=fixed_tasks)
     
     log_to_wal("HEALTH_CHECK", {
         "issues_found": len(issues),
         "auto_fixes_applied": len(fixes),
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
+        "timestamp": now
+    }, now)
     
     result = {
         "success": True,
@@ -543,39 +821,90 @@ def health_check(args) -> None:
         "auto_fixes": fixes,
         "summary": f"Found {len(issues)} issues, auto-fixed {len(fixes)}"
     }
-    print(json.dumps(result, indent=2))
+    return result
 
 
-def flush_buffer(args) -> None:
+def flush_buffer(data: Optional[Dict[str, Any]], args) -> Dict[str, Any]:
     """Flush working buffer to daily memory file."""
     if not WORKING_BUFFER_FILE.exists():
         result = {
             "success": True,
             "message": "Buffer is empty, nothing to flush"
         }
-        print(json.dumps(result, indent=2))
-        return
+        return result
     
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    today = utc_now()[0][:10]
     daily_file = MEMORY_DIR / f"{today}.md"
     
     with open(WORKING_BUFFER_FILE, 'r') as f:
         buffer_content = f.read()
     
     section = f"\n## Task Updates\n{buffer_content}\n"
-    with open(daily_file, 'a') as f:
-        f.write(section)
+    with open(daily_file, 'ab', buffering=0) as f:
+        f.write(section.encode())
     
     WORKING_BUFFER_FILE.write_text("")
     
     result = {
         "success": True,
         "message": f"Buffer flushed to {daily_file}",
-        "lines_flushed": len(buffer_content.split('\n'))
+        "lines_flushed": buffer_content.count("\n") + 1
     }
-    print(json.dumps(result, indent=2))
-
-def main():
+    return result
+
+def daemon(data: Dict[str, Any], args) -> None:
+    """Run commands from stdin against one in-memory load of the task data.
+    
+    Each input line is a JSON array of CLI arguments, e.g.
+    ["mark-progress", "task_abc123", "50"]. Each command writes one compact
+    JSON result line to stdout. Changes still go to tasks.log as they happen;
+    a full snapshot is written every --snapshot-every commands and on exit,
+    if the daemon wrote anything. Lines other processes append to tasks.log are
+    replayed before each command, so CLI writes made meanwhile are kept.
+    """
+    parser = build_parser()
+    out = sys.stdout.buffer
+    processed = 0
+    
+    try:
+        for line in sys.stdin.buffer:
+            if not line.strip():
+                continue
+            
+            try:
+                catch_up_log(data)
+                try:
+                    argv = decode_json(line)
+                except ValueError:
+                    argv = None
+                if not isinstance(argv, list) or not argv or argv[0] == "daemon":
+                    raise TaskManagerError("Expected a JSON array of CLI arguments, e.g. [\"status\"]")
+                argv = [str(arg) for arg in argv]
+                try:
+                    # Keep stdout for JSON results only: --help and usage go to stderr
+                    with contextlib.redirect_stdout(sys.stderr):
+                        command_args = parser.parse_args(argv)
+                except SystemExit:
+                    raise TaskManagerError(f"Invalid arguments: {' '.join(argv)}")
+                result = command_args.func(data, command_args)
+            except TaskManagerError as e:
+                result = {"success": False, "error": str(e)}
+            except Exception as e:
+                # One bad command must not drop the rest of the batch
+                result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+            
+            out.write(encode_json(result) + b"\n")
+            out.flush()
+            
+            processed += 1
+            if args.snapshot_every and processed % args.snapshot_every == 0 and data["_pending_writes"]:
+                compact(data)
+    finally:
+        if data["_pending_writes"]:
+            compact(data)
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the CLI parser; each subcommand binds its handler via set_defaults(func=...)."""
     parser = argparse.ArgumentParser(description="Proactive Task Manager")
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
@@ -585,6 +914,7 @@ def main():
     parser_add_goal.add_argument("--priority", choices=["low", "medium", "high"], default="medium")
     parser_add_goal.add_argument("--context", help="Goal context/background")
     parser_add_goal.add_argument("--status", choices=["active", "paused", "completed"], default="active")
+    parser_add_goal.set_defaults(func=add_goal)
     
     # add-task
     parser_add_task = subparsers.add_parser("add-task", help="Add a task to a goal")
@@ -593,16 +923,19 @@ def main():
     parser_add_task.add_argument("--priority", choices=["low", "medium", "high"])
     parser_add_task.add_argument("--depends-on", help="Comma-separated task IDs this depends on")
     parser_add_task.add_argument("--estimate", type=int, help="Estimated minutes to complete")
+    parser_add_task.set_defaults(func=add_task)
     
     # next-task
     parser_next_task = subparsers.add_parser("next-task", help="Get next task to work on")
     parser_next_task.add_argument("--goal", help="Goal ID filter")
     parser_next_task.add_argument("--max-estimate", type=int, help="Max time estimate filter")
+    parser_next_task.set_defaults(func=next_task)
     
     # complete-task
     parser_complete_task = subparsers.add_parser("complete-task", help="Mark task as completed")
     parser_complete_task.add_argument("task_id", help="Task ID")
     parser_complete_task.add_argument("--notes", help="Completion notes")
+    parser_complete_task.set_defaults(func=complete_task)
     
     # update-task
     parser_update_task = subparsers.add_parser("update-task", help="Update a task")
@@ -610,70 +943,79 @@ def main():
     parser_update_task.add_argument("--status", choices=["pending", "in_progress", "blocked", "needs_input", "completed", "cancelled"])
     parser_update_task.add_argument("--priority", choices=["low", "medium", "high"])
     parser_update_task.add_argument("--notes", help="Add notes")
+    parser_update_task.set_defaults(func=update_task)
     
     # list-goals
     parser_list_goals = subparsers.add_parser("list-goals", help="List goals")
     parser_list_goals.add_argument("--status", choices=["active", "paused", "completed"])
     parser_list_goals.add_argument("--priority", choices=["low", "medium", "high"])
+    parser_list_goals.set_defaults(func=list_goals)
     
     # list-tasks
     parser_list_tasks = subparsers.add_parser("list-tasks", help="List tasks for a goal")
     parser_list_tasks.add_argument("goal_title", help="Goal title (partial match)")
     parser_list_tasks.add_argument("--status", choices=["pending", "in_progress", "blocked", "needs_input", "completed", "cancelled"])
     parser_list_tasks.add_argument("--priority", choices=["low", "medium", "high"])
+    parser_list_tasks.set_defaults(func=list_tasks)
     
     # status
     parser_status = subparsers.add_parser("status", help="Show overall status")
+    parser_status.set_defaults(func=status)
     
     # Phase 2 commands
     
     # mark-progress
-    parser_mark_progress = subparsers.add_parser("mark-progress", help="Mark task progress (0-100%)")
+    parser_mark_progress = subparsers.add_parser("mark-progress", help="Mark task progress (0-100%%)")
     parser_mark_progress.add_argument("task_id", help="Task ID")
     parser_mark_progress.add_argument("progress", type=int, help="Progress percentage (0-100)")
     parser_mark_progress.add_argument("--notes", help="Optional notes")
+    parser_mark_progress.set_defaults(func=mark_progress)
     
     # log-time
     parser_log_time = subparsers.add_parser("log-time", help="Log time spent on task")
     parser_log_time.add_argument("task_id", help="Task ID")
     parser_log_time.add_argument("minutes", type=int, help="Minutes spent")
     parser_log_time.add_argument("--notes", help="Optional notes")
+    parser_log_time.set_defaults(func=log_time)
     
     # mark-blocked
     parser_mark_blocked = subparsers.add_parser("mark-blocked", help="Mark task as blocked")
     parser_mark_blocked.add_argument("task_id", help="Task ID")
     parser_mark_blocked.add_argument("reason", help="Reason for blocking")
+    parser_mark_blocked.set_defaults(func=mark_blocked)
     
     # health-check
     parser_health_check = subparsers.add_parser("health-check", help="Check and fix broken task states")
+    parser_health_check.set_defaults(func=health_check)
     
     # flush-buffer
     parser_flush_buffer = subparsers.add_parser("flush-buffer", help="Flush working buffer to daily memory")
+    parser_flush_buffer.set_defaults(func=flush_buffer, needs_data=False)
+    
+    # daemon
+    parser_daemon = subparsers.add_parser("daemon", help="Run commands from stdin (one JSON argv array per line) against one in-memory load")
+    parser_daemon.add_argument("--snapshot-every", type=int, default=DAEMON_SNAPSHOT_EVERY, help="Write a tasks.json snapshot every N commands (0 = only on exit)")
+    parser_daemon.set_defaults(func=daemon)
     
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
-    if not args.command:
+    if not hasattr(args, "func"):
         parser.print_help()
         sys.exit(1)
     
-    # Route to command handlers
-    commands = {
-        "add-goal": add_goal,
-        "add-task": add_task,
-        "next-task": next_task,
-        "complete-task": complete_task,
-        "update-task": update_task,
-        "list-goals": list_goals,
-        "list-tasks": list_tasks,
-        "status": status,
-        "mark-progress": mark_progress,
-        "log-time": log_time,
-        "mark-blocked": mark_blocked,
-        "health-check": health_check,
-        "flush-buffer": flush_buffer
-    }
+    try:
+        data = load_data() if getattr(args, "needs_data", True) else None
+        result = args.func(data, args)
+    except TaskManagerError as e:
+        emit({"success": False, "error": str(e)}, indent=False, stream=sys.stderr)
+        sys.exit(1)
     
-    commands[args.command](args)
+    if result is not None:
+        emit(result)
 
 if __name__ == "__main__":
     main()
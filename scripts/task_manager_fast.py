@@ -0,0 +1,11 @@
+#!/usr/bin/env pypy3
+"""
+Proactive Task Manager - PyPy entry point.
+Same CLI as task_manager.py, run under PyPy for large tasks.json files and
+long batch runs where the JIT pays off (health-check, status, daemon).
+"""
+
+from task_manager import main
+
+if __name__ == "__main__":
+    main()